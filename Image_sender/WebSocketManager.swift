@@ -139,19 +139,16 @@ class WebSocketManager: ObservableObject {
             return
         }
         
-        // Encode image data as base64
-        let imageBase64 = imageData.base64EncodedString()
-        
-        // Prepare frame data dictionary
+        // Prepare frame data dictionary. Data values are sent as Socket.IO binary
+        // attachments, avoiding base64 encoding (and its 33% size overhead)
         var frameData: [String: Any] = [
             "metadata": metadata,
-            "image": imageBase64
+            "image": imageData
         ]
         
         // Add depth data if available
         if let depthData = depthData {
-            let depthBase64 = depthData.base64EncodedString()
-            frameData["depth"] = depthBase64
+            frameData["depth"] = depthData
         }
         
         // Emit frame_response event
@@ -1,24 +1,207 @@
+import os
+
+# Flask-SocketIO async backend: 'threading' (Werkzeug development server, the default),
+# 'eventlet' (cooperative eventlet WSGI server) or 'gevent' (gevent pywsgi server, with
+# WebSocket support when gevent-websocket is installed). Chosen by environment variable
+# because eventlet and gevent have to monkey-patch the standard library before anything
+# else is imported; installing either package doesn't switch to it on its own.
+ASYNC_MODE = os.environ.get('AR_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+    from eventlet import tpool
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+
 from flask import Flask, request, jsonify
-from flask_socketio import SocketIO, emit, disconnect
-import json
+from flask.wrappers import Request
+from flask_socketio import SocketIO, emit, disconnect, join_room
+from werkzeug.exceptions import RequestEntityTooLarge
+import orjson
 import numpy as np
 from datetime import datetime
-import os
+import math
+import tempfile
 import threading
 import sys
 import re
 import requests
-import base64
 import argparse
 import time
+import logging
+import logging.handlers
+import queue
+import io
+import selectors
+import errno
+import stat
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from functools import partial, lru_cache
+import hashlib
+import itertools
+from dataclasses import dataclass, field
+
+try:
+    import blosc2  # Optional: only needed for --compress-depth
+except ImportError:
+    blosc2 = None
+
+try:
+    import pybase64 as base64  # Optional: SIMD-accelerated drop-in for base64.b64decode
+except ImportError:
+    import base64
+
+try:
+    import numba  # Optional: JIT-compiled depth statistics
+except ImportError:
+    numba = None
+
+logger = logging.getLogger("ar")
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that writes records into its stream buffer without flushing each one."""
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers once, whenever the queue runs empty."""
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+def open_log_stream(buffer_size=1 << 16):
+    """
+    Open a block-buffered text stream onto stdout for the log listener.
+    
+    sys.stdout is line-buffered on a terminal, which turns every log line into its
+    own write() syscall. Writing through a separate block buffer lets a burst of
+    per-frame lines go out in a single write when the listener flushes.
+    
+    Args:
+        buffer_size: Size of the write buffer in bytes
+    
+    Returns:
+        A writable text stream (sys.stdout itself if it has no usable file descriptor)
+    """
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return sys.stdout
+    return open(fd, 'w', buffering=buffer_size, encoding=sys.stdout.encoding or 'utf-8',
+                errors='backslashreplace', closefd=False)
+
+def setup_logging(level=logging.INFO):
+    """
+    Route server log output through a queue to a background listener thread.
+    
+    Handlers only enqueue records; %-style arguments are formatted and written to
+    a buffered stdout stream by the listener, which flushes once per burst of
+    records (whenever its queue drains), so request threads never block on
+    terminal I/O and a frame's log lines cost one write instead of one each.
+    
+    Args:
+        level: Logging level for the server logger (DEBUG enables per-frame camera reports)
+    
+    Returns:
+        QueueListener: The started listener (stopped automatically at exit)
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = BufferedStreamHandler(open_log_stream())
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = DrainingQueueListener(log_queue, stream_handler)
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    atexit.register(stream_handler.flush)
+    atexit.register(listener.stop)
+    return listener
+
+class TokenBucket:
+    """Thread-safe token bucket: allows bursts of up to capacity, refilled at rate tokens per second."""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def consume(self):
+        """Take one token if available; returns False when the bucket is empty."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+# Full tracebacks for errors a client can trigger repeatedly; past this budget they
+# are logged as one line so a misbehaving sender can't flood the log
+error_tracebacks = TokenBucket(rate=1.0, capacity=10)
+
+def log_error(message, *args):
+    """Log an error with its traceback while the error_tracebacks budget allows, else as one line."""
+    if error_tracebacks.consume():
+        logger.exception(message, *args)
+    else:
+        logger.error(message, *args)
+
+class StreamingRequest(Request):
+    """Request that spools every uploaded file part to an on-disk temporary file.
+
+    Werkzeug's default stream factory keeps parts up to 500KB in memory before
+    rolling over, so frames would still be buffered in RAM during parsing.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.TemporaryFile('wb+')
 
 app = Flask(__name__)
+app.request_class = StreamingRequest
+# Reject oversized uploads up front instead of spooling them to disk first
+MAX_UPLOAD_SIZE = 256 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE
+class OrjsonPacketJSON:
+    """json-module stand-in for Socket.IO packet encoding, backed by orjson."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        # orjson output is always compact, which is what the separators argument asks for
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
 # Increase max_http_buffer_size to handle large base64-encoded images (default is 1MB)
 # Base64 encoding adds ~33% overhead, so 1MB image becomes ~1.3MB
 socketio = SocketIO(
     app, 
     cors_allowed_origins="*", 
-    async_mode='threading',
+    async_mode=ASYNC_MODE,
+    json=OrjsonPacketJSON,  # Encode/decode event payloads in C
     max_http_buffer_size=10 * 1024 * 1024,  # 10MB to handle large frames
     ping_timeout=60,  # Increase timeout for large transfers
     ping_interval=25
@@ -27,104 +210,490 @@ socketio = SocketIO(
 # Create directory for received images
 RECEIVED_DIR = 'received_images'
 os.makedirs(RECEIVED_DIR, exist_ok=True)
+# Absolute form of RECEIVED_DIR, resolved once so saved paths need no per-frame abspath()
+RECEIVED_DIR_ABS = os.path.abspath(RECEIVED_DIR)
 
-# Track frame numbers per client
-frame_counters = {}
+# Track frame numbers per client: {tracking_id: itertools.count yielding 1, 2, ...}
+# Kept in least-recently-used order and capped, since every reconnect (new session
+# ID or ephemeral port) introduces a new tracking_id
+MAX_FRAME_COUNTERS = 4096
+frame_counters = OrderedDict()
+frame_counters_lock = threading.Lock()
 
 # Track WebSocket connected clients
 connected_clients = set()
 last_trigger_time = None
 
+# Socket.IO room that every connected client joins, used to broadcast capture triggers
+CAPTURE_ROOM = 'cameras'
+
 # Map client IP addresses to WebSocket session IDs
 # Format: {ip_address: websocket_session_id}
 client_ip_to_session_id = {}
+# Reverse of client_ip_to_session_id, so a disconnect finds its IP mapping without a scan
+# Format: {websocket_session_id: ip_address}
+session_id_to_ip = {}
+# Guards connected_clients, client_ip_to_session_id and session_id_to_ip, which are
+# updated from Socket.IO handlers, HTTP requests and the trigger threads
+connection_lock = threading.RLock()
 
-# Track pending captures: {capture_id: set of client_ids that should respond}
-pending_captures = {}
-# Track which clients have responded for each capture: {capture_id: set of client_ids that have responded}
-capture_responses = {}
-# Track image paths for each capture: {capture_id: list of dicts with image_path, depth_path, metadata_path}
-capture_image_paths = {}
-# Lock for thread-safe access to capture tracking
+@dataclass(slots=True)
+class Capture:
+    """Response tracking for one triggered capture."""
+    # client_ids that should respond
+    expected: set
+    # client_ids that have responded
+    responded: set = field(default_factory=set)
+    # dicts with image_path, depth_path, metadata_path for each response
+    paths: list = field(default_factory=list)
+    # write futures for the files in paths, in the same order
+    writes: list = field(default_factory=list)
+    # Set once the capture has completed or been abandoned; late responses are ignored
+    closed: bool = False
+    # Guards the fields above, so responses to different captures don't contend
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+# Track pending captures: {capture_id: Capture}
+captures = {}
+# Lock for adding, finding and removing entries in captures (each Capture has its own lock)
 capture_lock = threading.Lock()
 
 # URL for the process endpoint
 PROCESS_ENDPOINT = 'http://127.0.0.1:8081/process'
+# Shared session so /process calls reuse keep-alive connections instead of reconnecting each time
+# (pool_maxsize covers completions that overlap while an earlier POST is still in flight)
+PROCESS_SESSION = requests.Session()
+PROCESS_SESSION.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+PROCESS_SESSION.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Runs of characters that are unsafe in filenames (or underscores), replaced by a single '_'
+FILENAME_UNSAFE_RE = re.compile(r'(?:[^\w.\-]|_)+')
+# Longest client-supplied capture ID used in filenames (server-issued ones are 22 characters)
+MAX_CAPTURE_ID_LENGTH = 64
+
+# Index permutation that turns a row-major flattened 4x4 matrix into column-major order
+EXTRINSICS_COLUMN_MAJOR_ORDER = (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)
+
+# Background writers for received frame files, so handlers can ack before the data reaches disk.
+# Under eventlet/gevent these are green threads; their blocking calls go through offload()
+WRITE_WORKERS = 4
+WRITE_EXECUTOR = ThreadPoolExecutor(max_workers=WRITE_WORKERS, thread_name_prefix='frame-write')
+# Bound the frames queued or being written; past this, uploads are refused instead of
+# piling up open temp files and metadata in memory
+MAX_PENDING_WRITES = 256
+write_slots = threading.Semaphore(MAX_PENDING_WRITES)
+
+class WriteBacklogFull(Exception):
+    """Raised by save_frame_files when MAX_PENDING_WRITES frames are already waiting on disk."""
+
+# Background workers for the per-frame camera data report, so handlers can ack immediately
+REPORT_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='frame-report')
+def offload(func, *args):
+    """
+    Run a blocking call (file I/O, compression) on a real OS thread.
+    
+    Under eventlet or gevent the executors' workers are green threads sharing one
+    hub, so a blocking call made from them directly would stall every Socket.IO and
+    HTTP connection until it returned. The call is handed to eventlet's tpool or
+    gevent's hub threadpool instead, and only the calling green thread waits. In
+    threading mode it is simply called.
+    
+    func runs outside the hub, so it must not log or take any threading lock
+    (including ones inside libraries such as Numba's dispatcher); once patched,
+    those are green and only work on the hub's thread.
+    
+    Args:
+        func: Blocking callable
+        *args: Positional arguments for func
+    
+    Returns:
+        Whatever func returns; its exceptions are re-raised in the caller
+    """
+    if ASYNC_MODE == 'eventlet':
+        return tpool.execute(func, *args)
+    if ASYNC_MODE == 'gevent':
+        return gevent.get_hub().threadpool.apply(func, args)
+    return func(*args)
+
+# Bound the number of reports queued or running to keep memory flat under bursts
+report_slots = threading.Semaphore(4)
+# Reports dropped because every slot was busy (next() is atomic, so no lock is needed)
+dropped_reports = itertools.count(1)
+
+# Compress depth maps with Blosc2 (LZ4 + bit-shuffle) before saving; enabled by --compress-depth
+COMPRESS_DEPTH = False
+COMPRESSED_DEPTH_SUFFIX = '_depth.blosc2'
+
+# Chunk size used when streaming uploaded files to disk
+UPLOAD_COPY_BUFSIZE = 1 << 20
+# Copy buffers reused by write_payload's read/write fallback, one per writer thread.
+# A plain list (pop/append are atomic) rather than a queue.Queue, whose locks become
+# green under eventlet/gevent and can't be taken from offload()'s OS threads
+COPY_BUFFER_POOL = [bytearray(UPLOAD_COPY_BUFSIZE) for _ in range(WRITE_WORKERS)]
+
+# (epoch second, formatted text) of the last frame timestamp, swapped as one tuple
+_frame_timestamp_cache = (0, '')
+
+def frame_timestamp():
+    """Return the local time as YYYYmmdd_HHMMSS, running strftime at most once per second."""
+    global _frame_timestamp_cache
+    now = int(time.time())
+    cached_second, cached_text = _frame_timestamp_cache
+    if now != cached_second:
+        cached_text = time.strftime('%Y%m%d_%H%M%S', time.localtime(now))
+        _frame_timestamp_cache = (now, cached_text)
+    return cached_text
+
+def next_frame_number(tracking_id):
+    """
+    Return the next frame number (starting at 1) for a client.
+    
+    The least recently used counter is evicted once more than MAX_FRAME_COUNTERS
+    clients are tracked.
+    
+    Args:
+        tracking_id: WebSocket session ID or server client_id of the sender
+    
+    Returns:
+        int: The frame number for this frame
+    """
+    with frame_counters_lock:
+        counter = frame_counters.get(tracking_id)
+        if counter is None:
+            counter = frame_counters[tracking_id] = itertools.count(1)
+            if len(frame_counters) > MAX_FRAME_COUNTERS:
+                frame_counters.popitem(last=False)
+        else:
+            frame_counters.move_to_end(tracking_id)
+        return next(counter)
+
+@lru_cache(maxsize=1024)
+def frame_directory(shard, day):
+    """
+    Return (creating it on first use) the directory that holds one shard's frames for a day.
+    
+    Frames are spread over RECEIVED_DIR/<shard>/<YYYYmmdd> so no single directory
+    grows without bound over long recordings. The cache means makedirs runs once
+    per directory rather than once per frame.
+    
+    Args:
+        shard: Two hex digits bucketing the sending device
+        day: Local date as YYYYmmdd
+    
+    Returns:
+        str: Absolute directory path
+    """
+    path = f'{RECEIVED_DIR_ABS}/{shard}/{day}'
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def write_to_fd(fd, data):
+    """Write all of data to a raw file descriptor, retrying on short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+# errno values meaning an in-kernel copy isn't possible for this pair of files
+# (e.g. across filesystems on older kernels); the copy falls back to read/write
+KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+def kernel_copy(src_fd, dst_fd, offset, count):
+    """
+    Copy bytes from one file to another without passing them through user space.
+    
+    Uses copy_file_range where available, then sendfile on Linux (which accepts a
+    regular file as the destination there, unlike macOS).
+    
+    Args:
+        src_fd: Source file descriptor (read from offset; its file position is not used)
+        dst_fd: Destination file descriptor (written at, and advancing, its file position)
+        offset: Position in the source to start copying from
+        count: Number of bytes to copy
+    
+    Returns:
+        int: Bytes copied; less than count if in-kernel copying isn't supported,
+            in which case the caller copies the rest itself
+    """
+    copied = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < count:
+                n = os.copy_file_range(src_fd, dst_fd, count - copied, offset + copied)
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    if sys.platform.startswith('linux'):
+        try:
+            while copied < count:
+                n = os.sendfile(dst_fd, src_fd, offset + copied, count - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    return copied
+
+def copy_stream_to_fd(stream, fd):
+    """Copy the rest of a stream into fd through a pooled buffer.
+
+    Args:
+        stream: Binary file object supporting readinto
+        fd: Destination file descriptor
+
+    Returns:
+        Number of bytes copied
+    """
+    try:
+        buf = COPY_BUFFER_POOL.pop()
+    except IndexError:
+        # More concurrent writers than pooled buffers; this one is dropped afterwards
+        buf = bytearray(UPLOAD_COPY_BUFSIZE)
+    copied = 0
+    readinto = stream.readinto
+    try:
+        with memoryview(buf) as view:
+            while True:
+                n = readinto(view)
+                if not n:
+                    break
+                write_to_fd(fd, view[:n])
+                copied += n
+    finally:
+        if len(COPY_BUFFER_POOL) < WRITE_WORKERS:
+            COPY_BUFFER_POOL.append(buf)
+    return copied
+
+def write_payload(path, payload):
+    """
+    Write a payload to disk and return the number of bytes written.
+    
+    Writes go straight to the file descriptor (no BufferedWriter copy), and the
+    written pages are dropped from the page cache afterwards since received
+    frames are only handed on by path and never read back by this server.
+    
+    Args:
+        path: Destination file path
+        payload: Either bytes or a readable binary file object. File objects backed
+            by a real file are copied in the kernel (kernel_copy); anything left is
+            streamed in UPLOAD_COPY_BUFSIZE chunks, so it never has to be held in memory
+    
+    Returns:
+        int: Number of bytes written
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            write_to_fd(fd, payload)
+            written = len(payload)
+        else:
+            written = 0
+            size = None
+            try:
+                src_fd = payload.fileno()
+            except (AttributeError, OSError):
+                src_fd = None
+            if src_fd is not None:
+                offset = payload.tell()
+                size = os.fstat(src_fd).st_size - offset
+                written = kernel_copy(src_fd, fd, offset, size)
+                payload.seek(offset + written)
+            if size is None or written < size:
+                # No fd, or the in-kernel copy stopped short; stream the rest
+                written += copy_stream_to_fd(payload, fd)
+        if hasattr(os, 'posix_fadvise'):
+            # Starts writeback and releases the cached pages instead of letting them pile up
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return written
+    finally:
+        os.close(fd)
+
+def detach_payload(payload):
+    """
+    Make a payload safe to read after the request that received it has finished.
+    
+    Werkzeug closes upload streams when the request ends, so a stream is replaced
+    by an independent unbuffered handle on the same spooled temp file (or read into
+    memory if it has no file descriptor). Bytes and None are returned unchanged.
+    """
+    if payload is None or isinstance(payload, (bytes, bytearray, memoryview)):
+        return payload
+    try:
+        fd = payload.fileno()
+    except (AttributeError, OSError):
+        return payload.read()
+    return os.fdopen(os.dup(fd), 'rb', buffering=0)
+
+def payload_size(payload):
+    """Return the number of bytes left to read in a bytes payload or a detached file stream."""
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return memoryview(payload).nbytes
+    return os.fstat(payload.fileno()).st_size - payload.tell()
+
+def compress_depth_payload(payload):
+    """Compress a raw float32 depth payload (bytes or readable stream) with Blosc2."""
+    if not isinstance(payload, (bytes, bytearray, memoryview)):
+        payload = payload.read()
+    if not payload:
+        return b''
+    return blosc2.compress(payload, typesize=4, codec=blosc2.Codec.LZ4, filter=blosc2.Filter.BITSHUFFLE)
+
+def load_depth_buffer(depth_filename):
+    """
+    Return the raw bytes of a saved depth map as a uint8 array.
+    
+    Uncompressed files are memory-mapped; Blosc2-compressed files are decompressed into memory.
+    """
+    if depth_filename.endswith(COMPRESSED_DEPTH_SUFFIX):
+        with open(depth_filename, 'rb') as f:
+            return np.frombuffer(blosc2.decompress(f.read()), dtype=np.uint8)
+    return np.memmap(depth_filename, dtype=np.uint8, mode='r')
+
+def _numpy_depth_statistics(depth_array):
+    """
+    Compute min, max and mean over the finite values of a flat depth array.
+    
+    The finite mask is built once and passed to each reduction via where=,
+    instead of copying every finite value into a new array first.
+    
+    Returns:
+        tuple: (min, max, mean, finite_count); the statistics are NaN if no value is finite
+    """
+    finite_mask = np.isfinite(depth_array)
+    finite_count = int(np.count_nonzero(finite_mask))
+    if finite_count == 0:
+        return (float('nan'), float('nan'), float('nan'), 0)
+    depth_min = float(depth_array.min(where=finite_mask, initial=np.inf))
+    depth_max = float(depth_array.max(where=finite_mask, initial=-np.inf))
+    depth_sum = float(depth_array.sum(where=finite_mask, dtype=np.float64))
+    return (depth_min, depth_max, depth_sum / finite_count, finite_count)
+
+if numba is not None:
+    # Single serial pass over the array with no mask allocation. fastmath is limited
+    # to reassociation/contraction so the reductions vectorize; the no-NaN/no-Inf
+    # flags would let LLVM fold away the isfinite() test this kernel relies on.
+    # Not parallel=True: reports run on several REPORT_EXECUTOR threads, which numba's
+    # workqueue threading layer can't serve concurrently, and a depth map is small
+    # enough that the serial loop is just as fast.
+    @numba.njit(cache=True, fastmath={'reassoc', 'contract'})
+    def _numba_depth_statistics(depth_array):
+        depth_min = np.inf
+        depth_max = -np.inf
+        depth_sum = 0.0
+        finite_count = 0
+        for i in range(depth_array.size):
+            value = depth_array[i]
+            if np.isfinite(value):
+                depth_min = min(depth_min, value)
+                depth_max = max(depth_max, value)
+                depth_sum += value
+                finite_count += 1
+        return depth_min, depth_max, depth_sum, finite_count
+
+def depth_statistics(depth_array):
+    """
+    Compute min, max and mean over the finite values of a flat depth array.
+    
+    Uses the Numba kernel when numba is installed and falls back to masked
+    NumPy reductions otherwise.
+    
+    Returns:
+        tuple: (min, max, mean, finite_count); the statistics are NaN if no value is finite
+    """
+    if numba is None:
+        return _numpy_depth_statistics(depth_array)
+    depth_min, depth_max, depth_sum, finite_count = _numba_depth_statistics(depth_array)
+    if finite_count == 0:
+        return (float('nan'), float('nan'), float('nan'), 0)
+    return (float(depth_min), float(depth_max), depth_sum / finite_count, int(finite_count))
+
+def warm_up_depth_statistics():
+    """Compile (or load from cache) the Numba depth kernel so the first frame doesn't pay for it."""
+    if numba is not None:
+        _numba_depth_statistics(np.zeros(1, dtype=np.float32))
 
-def process_camera_data(metadata, image_data, depth_data, client_addr):
-    """Process and display camera intrinsics and extrinsics."""
-    print("\n" + "="*60)
-    print(f"Received AR Frame Data from {client_addr}")
-    print("="*60)
+def process_camera_data(metadata, image_filename, depth_filename, client_addr):
+    """Process and display camera intrinsics and extrinsics for a saved frame (DEBUG level)."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    # Collected and logged as one record so a report isn't interleaved with other output
+    lines = ["\n" + "="*60, "Received AR Frame Data from %s" % (client_addr,), "="*60]
     
     # Extract intrinsics
     if 'intrinsics' in metadata:
         intrinsics = metadata['intrinsics']
-        print("\nCamera Intrinsics:")
+        lines.append("\nCamera Intrinsics:")
         if isinstance(intrinsics, list):
             # If it's a flat list, reshape to 3x3
             if len(intrinsics) == 9:
-                intrinsics_matrix = np.array(intrinsics).reshape(3, 3)
-                print(f"  fx: {intrinsics_matrix[0, 0]:.4f}")
-                print(f"  fy: {intrinsics_matrix[1, 1]:.4f}")
-                print(f"  cx: {intrinsics_matrix[0, 2]:.4f}")
-                print(f"  cy: {intrinsics_matrix[1, 2]:.4f}")
-                print(f"\nFull matrix:\n{intrinsics_matrix}")
+                # Row-major 3x3: fx, cx on row 0 and fy, cy on row 1
+                lines.append("  fx: %.4f" % intrinsics[0])
+                lines.append("  fy: %.4f" % intrinsics[4])
+                lines.append("  cx: %.4f" % intrinsics[2])
+                lines.append("  cy: %.4f" % intrinsics[5])
+                lines.append("\nFull matrix:\n%s" % np.asarray(intrinsics, dtype=np.float64).reshape(3, 3))
             else:
-                print(f"  Raw: {intrinsics}")
+                lines.append("  Raw: %s" % intrinsics)
         elif isinstance(intrinsics, dict):
-            print(f"  fx: {intrinsics.get('fx', 'N/A')}")
-            print(f"  fy: {intrinsics.get('fy', 'N/A')}")
-            print(f"  cx: {intrinsics.get('cx', 'N/A')}")
-            print(f"  cy: {intrinsics.get('cy', 'N/A')}")
+            lines.append("  fx: %s" % intrinsics.get('fx', 'N/A'))
+            lines.append("  fy: %s" % intrinsics.get('fy', 'N/A'))
+            lines.append("  cx: %s" % intrinsics.get('cx', 'N/A'))
+            lines.append("  cy: %s" % intrinsics.get('cy', 'N/A'))
         else:
-            print(f"  {intrinsics}")
+            lines.append("  %s" % intrinsics)
     
     # Extract extrinsics
     if 'extrinsics' in metadata:
         extrinsics = metadata['extrinsics']
-        print("\nCamera Extrinsics (4x4 transformation matrix):")
+        lines.append("\nCamera Extrinsics (4x4 transformation matrix):")
         if isinstance(extrinsics, list):
             # If it's a flat list, reshape to 4x4
             if len(extrinsics) == 16:
-                extrinsics_matrix = np.array(extrinsics).reshape(4, 4)
-                print(f"\nRotation (3x3):\n{extrinsics_matrix[:3, :3]}")
-                print(f"\nTranslation:\n{extrinsics_matrix[:3, 3]}")
-                print(f"\nFull matrix:\n{extrinsics_matrix}")
+                extrinsics_matrix = np.asarray(extrinsics, dtype=np.float64).reshape(4, 4)
+                lines.append("\nRotation (3x3):\n%s" % extrinsics_matrix[:3, :3])
+                lines.append("\nTranslation:\n%s" % extrinsics_matrix[:3, 3])
+                lines.append("\nFull matrix:\n%s" % extrinsics_matrix)
             else:
-                print(f"  Raw: {extrinsics}")
+                lines.append("  Raw: %s" % extrinsics)
         elif isinstance(extrinsics, dict):
             if 'rotation' in extrinsics and 'translation' in extrinsics:
-                print(f"  Rotation: {extrinsics['rotation']}")
-                print(f"  Translation: {extrinsics['translation']}")
+                lines.append("  Rotation: %s" % extrinsics['rotation'])
+                lines.append("  Translation: %s" % extrinsics['translation'])
             else:
-                print(f"  {extrinsics}")
+                lines.append("  %s" % extrinsics)
         else:
-            print(f"  {extrinsics}")
+            lines.append("  %s" % extrinsics)
     
     # Extract and print camera to sphere distance
     if 'camera_to_sphere_distance' in metadata:
         distance = metadata['camera_to_sphere_distance']
-        print(f"\nCamera to Sphere Distance: {distance:.4f} meters")
+        lines.append("\nCamera to Sphere Distance: %.4f meters" % distance)
     else:
         # Calculate distance from extrinsics if not provided
         if 'extrinsics' in metadata:
             extrinsics = metadata['extrinsics']
             if isinstance(extrinsics, list) and len(extrinsics) == 16:
-                extrinsics_matrix = np.array(extrinsics).reshape(4, 4)
-                translation = extrinsics_matrix[:3, 3]
-                distance = np.linalg.norm(translation)
-                print(f"\nCamera to Sphere Distance (calculated): {distance:.4f} meters")
+                # save_frame_files has already reordered extrinsics to column-major, so
+                # 3/7/11 aren't the translation; they are read to match the
+                # reshape(4, 4)[:3, 3] "Translation" printed above, as before that reorder
+                distance = math.hypot(extrinsics[3], extrinsics[7], extrinsics[11])
+                lines.append("\nCamera to Sphere Distance (calculated): %.4f meters" % distance)
     
     # Image info
-    print(f"\nImage size: {len(image_data)} bytes")
+    lines.append("\nImage size: %s bytes" % os.path.getsize(image_filename))
     if 'image_width' in metadata and 'image_height' in metadata:
-        print(f"Image dimensions: {metadata['image_width']}x{metadata['image_height']}")
+        lines.append("Image dimensions: %sx%s" % (metadata['image_width'], metadata['image_height']))
 
     depth_info = metadata.get('depth_info') or metadata.get('depth')
-    if depth_data:
-        print("\nDepth Map:")
-        print(f"  Size: {len(depth_data)} bytes")
+    if depth_filename:
+        depth_buffer = offload(load_depth_buffer, depth_filename)
+        depth_size = depth_buffer.size
+        lines.append("\nDepth Map:")
+        lines.append("  Size: %s bytes" % depth_size)
         if isinstance(depth_info, dict):
             width = depth_info.get('width')
             height = depth_info.get('height')
@@ -132,12 +701,12 @@ def process_camera_data(metadata, image_data, depth_data, client_addr):
             pixel_format = depth_info.get('pixel_format', 'unknown')
             units = depth_info.get('units', 'meters')
             depth_type = depth_info.get('type', 'sceneDepth')
-            print(f"  Type: {depth_type}")
+            lines.append("  Type: %s" % depth_type)
             if width and height:
-                print(f"  Dimensions: {width}x{height} (bytes/row: {bytes_per_row})")
-            print(f"  Format: {pixel_format} | Units: {units}")
+                lines.append("  Dimensions: %sx%s (bytes/row: %s)" % (width, height, bytes_per_row))
+            lines.append("  Format: %s | Units: %s" % (pixel_format, units))
             if 'confidence_available' in depth_info:
-                print(f"  Confidence map available: {depth_info['confidence_available']}")
+                lines.append("  Confidence map available: %s" % depth_info['confidence_available'])
 
             try:
                 if width and height:
@@ -145,38 +714,87 @@ def process_camera_data(metadata, image_data, depth_data, client_addr):
                     expected_elements = width * height
                     expected_size = expected_elements * bytes_per_element
 
-                    if len(depth_data) >= expected_size:
-                        depth_array = np.frombuffer(depth_data, dtype=np.float32, count=expected_elements)
-                        depth_array = depth_array.reshape((height, width))
-                        finite_depth = depth_array[np.isfinite(depth_array)]
-                        if finite_depth.size > 0:
-                            print(f"  Depth range: {float(finite_depth.min()):.3f}m - {float(finite_depth.max()):.3f}m")
-                            print(f"  Depth mean: {float(finite_depth.mean()):.3f}m")
+                    if depth_size >= expected_size:
+                        depth_array = depth_buffer[:expected_size].view(np.float32)
+                        # Not offloaded: it takes microseconds, and Numba's dispatcher takes a
+                        # threading lock, which is a green lock that can't be used off the hub
+                        depth_min, depth_max, depth_mean, finite_count = depth_statistics(depth_array)
+                        if finite_count > 0:
+                            lines.append("  Depth range: %.3fm - %.3fm" % (depth_min, depth_max))
+                            lines.append("  Depth mean: %.3fm" % depth_mean)
                     else:
-                        print(f"  Warning: Depth data size ({len(depth_data)}) smaller than expected ({expected_size})")
+                        lines.append("  Warning: Depth data size (%s) smaller than expected (%s)" % (depth_size, expected_size))
             except Exception as exc:
-                print(f"  Failed to compute depth statistics: {exc}")
+                lines.append("  Failed to compute depth statistics: %s" % exc)
         else:
-            print("  Depth metadata unavailable; skipping detailed analysis")
+            lines.append("  Depth metadata unavailable; skipping detailed analysis")
     else:
-        print("\nDepth Map: not provided")
+        lines.append("\nDepth Map: not provided")
+    
+    lines.append("="*60 + "\n")
+    logger.debug("\n".join(lines))
+
+def submit_camera_data_report(metadata, image_filename, depth_filename, client_addr, write_future=None):
+    """
+    Run process_camera_data on the report executor instead of the calling thread.
+    
+    Only file paths are handed over; the worker memory-maps the saved depth file,
+    so no frame buffers are retained after the handler returns. If the report
+    backlog is full the report is dropped (and counted) rather than stalling the
+    caller. Nothing is queued unless DEBUG logging is enabled.
     
-    print("="*60 + "\n")
+    If write_future is given, the report is queued only once that write has
+    completed successfully, since it reads the saved files back.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if write_future is not None:
+        def files_written(future):
+            if future.exception() is None:
+                submit_camera_data_report(metadata, image_filename, depth_filename, client_addr)
+        write_future.add_done_callback(files_written)
+        return
+    if not report_slots.acquire(blocking=False):
+        logger.warning("[%s] Report backlog full; skipped camera data report (%s dropped so far)",
+                       client_addr, next(dropped_reports))
+        return
+
+    def report_done(future):
+        report_slots.release()
+        exc = future.exception()
+        if exc is not None:
+            logger.error("[%s] Error processing camera data: %s", client_addr, exc)
+
+    try:
+        future = REPORT_EXECUTOR.submit(process_camera_data, metadata, image_filename, depth_filename, client_addr)
+    except Exception:
+        report_slots.release()
+        raise
+    future.add_done_callback(report_done)
 
 def save_frame_files(metadata, image_data, depth_data, client_addr, client_id, websocket_session_id):
     """
-    Save frame files (image, depth, metadata) and return file paths and frame number.
+    Name a frame's files (image, depth, metadata) and queue them to be written on WRITE_EXECUTOR.
+    
+    Returns as soon as the write is queued, so callers can ack the client without
+    waiting on disk; anything that reads the files must wait on the returned future.
     
     Args:
-        metadata: Dictionary containing frame metadata
-        image_data: Binary image data
-        depth_data: Binary depth data (can be None)
+        metadata: Dictionary containing frame metadata; updated in place with the
+            column-major extrinsics and the _server file references that are saved
+        image_data: Binary image data, or a readable binary stream to copy from
+        depth_data: Binary depth data or readable binary stream (can be None)
         client_addr: Client IP address
         client_id: Server-generated client identifier (IP:port)
         websocket_session_id: WebSocket session ID if available, None otherwise
     
     Returns:
-        tuple: (image_filename, depth_filename, metadata_filename, frame_number, tracking_id, metadata_to_save)
+        tuple: (image_filename, depth_filename, metadata_filename, frame_number, tracking_id, write_future);
+            the filenames are absolute paths under RECEIVED_DIR/<shard>/<YYYYmmdd>, and write_future
+            completes once all of them are on disk
+    
+    Raises:
+        WriteBacklogFull: If MAX_PENDING_WRITES frames are already queued; nothing is written
     """
     # Get WebSocket session ID from IP address mapping if not provided
     if websocket_session_id is None:
@@ -187,12 +805,9 @@ def save_frame_files(metadata, image_data, depth_data, client_addr, client_id, w
     # Use WebSocket session ID if available, otherwise use device name
     identifier_to_use = websocket_session_id if websocket_session_id else client_device_name
     
-    # Sanitize client identifier for filesystem use (replace spaces and special chars with underscores)
-    sanitized_client_id = re.sub(r'[^\w\-_\.]', '_', identifier_to_use)
-    # Remove multiple consecutive underscores
-    sanitized_client_id = re.sub(r'_+', '_', sanitized_client_id)
-    # Remove leading/trailing underscores
-    sanitized_client_id = sanitized_client_id.strip('_')
+    # Sanitize client identifier for filesystem use: special chars become underscores,
+    # runs of underscores collapse to one, and leading/trailing underscores are removed
+    sanitized_client_id = FILENAME_UNSAFE_RE.sub('_', identifier_to_use).strip('_')
     # If empty after sanitization, use server client_id
     if not sanitized_client_id:
         sanitized_client_id = client_id.replace(':', '_')
@@ -200,58 +815,167 @@ def save_frame_files(metadata, image_data, depth_data, client_addr, client_id, w
     # Get or increment frame number for this client
     # Use WebSocket session ID for tracking if available, otherwise use server client_id
     tracking_id = websocket_session_id if websocket_session_id else client_id
-    if tracking_id not in frame_counters:
-        frame_counters[tracking_id] = 0
-    frame_counters[tracking_id] += 1
-    frame_number = frame_counters[tracking_id]
+    frame_number = next_frame_number(tracking_id)
+    
+    # Build the shared filename prefix once. Frames answering a capture trigger use the
+    # capture ID (itself a microsecond timestamp) so every device's files for one capture
+    # share it; other frames use the current second, reformatted only when it changes
+    capture_id = metadata.get("capture_id")
+    current_timestamp = frame_timestamp()
+    timestamp = FILENAME_UNSAFE_RE.sub('_', capture_id).strip('_') if isinstance(capture_id, str) else ''
+    if not timestamp or len(timestamp) > MAX_CAPTURE_ID_LENGTH:
+        # Missing, or too long to keep the filename under the filesystem's name limit
+        timestamp = current_timestamp
+    # 256 buckets keyed on the device rather than the session ID, which changes on every
+    # reconnect; the client-provided name if there is one, else the peer IP
+    device_key = metadata.get("client_id")
+    if not isinstance(device_key, str) or not device_key:
+        device_key = client_addr or client_id
+    shard = hashlib.blake2b(device_key.encode(), digest_size=1).hexdigest()
+    # One directory per day, taken from the filename's own timestamp (capture IDs start
+    # with YYYYmmdd) so a frame's directory and filename agree around midnight
+    day = timestamp[:8] if timestamp[:8].isdigit() else current_timestamp[:8]
+    frame_dir = frame_directory(shard, day)
+    filename_prefix = f'{frame_dir}/frame_{sanitized_client_id}_{frame_number:04d}_{timestamp}'
     
-    # Generate timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Streams are read by the writer after this request ends, so take our own handle on them
+    image_data = detach_payload(image_data)
+    depth_data = detach_payload(depth_data)
     
-    # Save image with client identifier in filename
-    image_filename = f'{RECEIVED_DIR}/frame_{sanitized_client_id}_{frame_number:04d}_{timestamp}.jpg'
-    with open(image_filename, 'wb') as f:
-        f.write(image_data)
-    print(f"[{client_id}] Saved image: {image_filename}")
+    # Image filename with client identifier
+    image_filename = filename_prefix + '.jpg'
 
     depth_filename = None
     if depth_data is not None:
-        depth_filename = f'{RECEIVED_DIR}/frame_{sanitized_client_id}_{frame_number:04d}_{timestamp}_depth.bin'
-        with open(depth_filename, 'wb') as f:
-            f.write(depth_data)
-        print(f"[{client_id}] Saved depth map: {depth_filename}")
-    
-    # Save metadata (include saved file references)
-    metadata_to_save = dict(metadata)
-    extrinsics = metadata_to_save.get("extrinsics")
-    if isinstance(extrinsics, list):
-        try:
-            extrinsics_matrix = np.array(extrinsics).reshape(4, 4)
-            print("update extrinsics before saving")
-            metadata_to_save["extrinsics"] = extrinsics_matrix.flatten(order='F').tolist()
-        except ValueError:
-            # Leave as-is if the list cannot be reshaped (unexpected length)
-            pass
+        if payload_size(depth_data) > 0:
+            depth_filename = filename_prefix + (COMPRESSED_DEPTH_SUFFIX if COMPRESS_DEPTH else '_depth.bin')
+        else:
+            # Empty depth upload; don't create a zero-byte file
+            if hasattr(depth_data, 'close'):
+                depth_data.close()
+            depth_data = None
+    
+    # Save metadata (include saved file references). The dict was decoded for this
+    # request alone, so it is updated in place rather than copied
+    extrinsics = metadata.get("extrinsics")
+    if isinstance(extrinsics, list) and len(extrinsics) == 16:
+        # Reorder the row-major 4x4 matrix to column-major; other lengths are left as-is
+        metadata["extrinsics"] = [extrinsics[i] for i in EXTRINSICS_COLUMN_MAJOR_ORDER]
     
     # Add server-side client identifier (IP:port) to metadata
     # Client-provided identifier is already in metadata as "client_id"
-    server_info = metadata_to_save.get("_server")
+    server_info = metadata.get("_server")
     if not isinstance(server_info, dict):
         server_info = {}
     server_info["image_file"] = os.path.basename(image_filename)
     if depth_filename:
         server_info["depth_file"] = os.path.basename(depth_filename)
+        if COMPRESS_DEPTH:
+            server_info["depth_compression"] = "blosc2-lz4-bitshuffle"
     server_info["server_client_id"] = client_id  # Server-generated identifier (IP:port)
-    metadata_to_save["_server"] = server_info
+    metadata["_server"] = server_info
 
-    metadata_filename = f'{RECEIVED_DIR}/frame_{sanitized_client_id}_{frame_number:04d}_{timestamp}_metadata.json'
-    with open(metadata_filename, 'w') as f:
-        json.dump(metadata_to_save, f, indent=2)
-    print(f"[{client_id}] Saved metadata: {metadata_filename}")
+    metadata_filename = filename_prefix + '_metadata.json'
+    metadata_json = orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    
+    if not write_slots.acquire(blocking=False):
+        for payload in (image_data, depth_data):
+            if hasattr(payload, 'close'):
+                payload.close()
+        raise WriteBacklogFull(f"{MAX_PENDING_WRITES} frames are already waiting to be written")
     
-    return (image_filename, depth_filename, metadata_filename, frame_number, tracking_id, metadata_to_save)
+    write_future = WRITE_EXECUTOR.submit(
+        write_frame_files, client_id,
+        image_filename, image_data, depth_filename, depth_data, metadata_filename, metadata_json
+    )
+
+    def write_done(future):
+        write_slots.release()
+        exc = future.exception()
+        if exc is not None:
+            logger.error("[%s] Error saving frame files %s: %s", client_id, filename_prefix, exc)
 
-def handle_capture_response(metadata, tracking_id, image_filename, depth_filename, metadata_filename):
+    write_future.add_done_callback(write_done)
+    
+    return (image_filename, depth_filename, metadata_filename, frame_number, tracking_id, write_future)
+
+def write_frame_payload(path, payload):
+    """
+    Write one of a frame's files with write_payload (off the hub, via offload).
+    
+    If the frame's shard/day directory has been removed since frame_directory
+    created and cached it (e.g. archived by an operator), the cache is cleared,
+    the directory recreated, and the write retried once.
+    
+    Returns:
+        int: Number of bytes written
+    """
+    try:
+        return offload(write_payload, path, payload)
+    except FileNotFoundError:
+        frame_directory.cache_clear()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return offload(write_payload, path, payload)
+
+def write_frame_files(client_id, image_filename, image_data, depth_filename, depth_data, metadata_filename, metadata_json):
+    """
+    Write a frame's files to disk (runs on WRITE_EXECUTOR, queued by save_frame_files).
+    
+    Args:
+        client_id: Server-generated client identifier (IP:port), for logging
+        image_filename: Destination path for the image
+        image_data: Image bytes or detached stream
+        depth_filename: Destination path for the depth map (None if there is no depth)
+        depth_data: Raw depth bytes or detached stream (None if there is no depth)
+        metadata_filename: Destination path for the metadata JSON
+        metadata_json: Serialized metadata bytes
+    """
+    try:
+        write_frame_payload(image_filename, image_data)
+        logger.info("[%s] Saved image: %s", client_id, image_filename)
+        
+        if depth_filename is not None:
+            depth_payload = offload(compress_depth_payload, depth_data) if COMPRESS_DEPTH else depth_data
+            write_frame_payload(depth_filename, depth_payload)
+            logger.info("[%s] Saved depth map: %s", client_id, depth_filename)
+        
+        # Written last, so a metadata file on disk means the frame is complete
+        write_frame_payload(metadata_filename, metadata_json)
+        logger.info("[%s] Saved metadata: %s", client_id, metadata_filename)
+    finally:
+        for payload in (image_data, depth_data):
+            if hasattr(payload, 'close'):
+                payload.close()
+
+
+def call_process_endpoint(request_data, pending_writes=()):
+    """
+    POST a completed capture's image paths to PROCESS_ENDPOINT.
+    
+    Runs as a Socket.IO background task started by handle_capture_response.
+    
+    Args:
+        request_data: Dictionary with capture_id and the list of image path dicts
+        pending_writes: Write futures matching request_data['images']; the POST waits for
+            them, and images whose files failed to save are left out
+    """
+    if pending_writes:
+        # future.exception() blocks until that frame's files are on disk
+        request_data['images'] = [
+            image for image, write in zip(request_data['images'], pending_writes)
+            if write.exception() is None
+        ]
+    try:
+        response = PROCESS_SESSION.post(PROCESS_ENDPOINT, json=request_data, timeout=10)
+        logger.info("[Process] Response status: %s", response.status_code)
+        if response.status_code == 200:
+            logger.info("[Process] Successfully called /process endpoint with %s image(s)", len(request_data['images']))
+        else:
+            logger.warning("[Process] Warning: /process returned status %s", response.status_code)
+    except requests.exceptions.RequestException as e:
+        logger.error("[Process] Error calling /process endpoint: %s", e)
+
+def handle_capture_response(metadata, tracking_id, image_filename, depth_filename, metadata_filename, write_future):
     """
     Handle capture response tracking and call /process endpoint when all clients respond.
     
@@ -261,59 +985,65 @@ def handle_capture_response(metadata, tracking_id, image_filename, depth_filenam
         image_filename: Path to saved image file
         depth_filename: Path to saved depth file (can be None)
         metadata_filename: Path to saved metadata file
+        write_future: Future from save_frame_files that completes once the files above
+            are on disk; /process is called only after every response's write
+            finishes, and images whose write failed are left out of the request
     """
     # Check if this frame is part of a pending capture
     capture_id = metadata.get('capture_id')
-    if capture_id and capture_id in pending_captures:
+    if not capture_id:
+        return
+    
+    # Build this response's entry before taking the lock (save_frame_files already returns absolute paths)
+    image_path_data = {
+        'image_path': image_filename,
+        'metadata_path': metadata_filename
+    }
+    if depth_filename:
+        image_path_data['depth_path'] = depth_filename
+    
+    with capture_lock:
+        capture = captures.get(capture_id)
+    if capture is None:
+        return
+    
+    # Only the bookkeeping runs under this capture's lock; logging and the /process
+    # dispatch happen after it
+    with capture.lock:
+        if capture.closed:
+            return
+        
+        # Mark this client as having responded and store its paths
+        capture.responded.add(tracking_id)
+        capture.paths.append(image_path_data)
+        capture.writes.append(write_future)
+        expected_count = len(capture.expected)
+        responded_count = len(capture.responded)
+        
+        # Check if all expected clients have responded; if so, stop tracking this capture
+        complete = capture.responded.issuperset(capture.expected)
+        capture.closed = complete
+    
+    if complete:
         with capture_lock:
-            # Mark this client as having responded
-            if capture_id not in capture_responses:
-                capture_responses[capture_id] = set()
-            capture_responses[capture_id].add(tracking_id)
-            
-            # Store image paths for this capture (using absolute paths)
-            if capture_id not in capture_image_paths:
-                capture_image_paths[capture_id] = []
-            
-            image_path_data = {
-                'image_path': os.path.abspath(image_filename),
-                'metadata_path': os.path.abspath(metadata_filename)
-            }
-            if depth_filename:
-                image_path_data['depth_path'] = os.path.abspath(depth_filename)
-            capture_image_paths[capture_id].append(image_path_data)
-            
-            # Check if all expected clients have responded
-            expected_clients = pending_captures[capture_id]
-            responded_clients = capture_responses[capture_id]
-            
-            if responded_clients.issuperset(expected_clients):
-                # All clients have responded, call the process endpoint
-                print(f"\n[Capture {capture_id}] All {len(expected_clients)} client(s) have responded. Calling /process endpoint...")
-                
-                # Prepare the request data with image paths
-                request_data = {
-                    'capture_id': capture_id,
-                    'images': capture_image_paths[capture_id]
-                }
-                
-                try:
-                    response = requests.post(PROCESS_ENDPOINT, json=request_data, timeout=10)
-                    print(f"[Process] Response status: {response.status_code}")
-                    if response.status_code == 200:
-                        print(f"[Process] Successfully called /process endpoint with {len(capture_image_paths[capture_id])} image(s)")
-                    else:
-                        print(f"[Process] Warning: /process returned status {response.status_code}")
-                except requests.exceptions.RequestException as e:
-                    print(f"[Process] Error calling /process endpoint: {e}")
-                
-                # Clean up tracking for this capture
-                del pending_captures[capture_id]
-                del capture_responses[capture_id]
-                del capture_image_paths[capture_id]
-            else:
-                remaining = len(expected_clients) - len(responded_clients)
-                print(f"[Capture {capture_id}] {len(responded_clients)}/{len(expected_clients)} clients responded ({remaining} remaining)")
+            captures.pop(capture_id, None)
+    
+    if complete:
+        # All clients have responded, call the process endpoint
+        logger.info("\n[Capture %s] All %s client(s) have responded. Calling /process endpoint...", capture_id, expected_count)
+        
+        # Prepare the request data with image paths (the capture is no longer shared, so no copy is needed)
+        request_data = {
+            'capture_id': capture_id,
+            'images': capture.paths
+        }
+        
+        # POST in the background so the last client's response doesn't wait on the
+        # remaining file writes or on /process
+        socketio.start_background_task(call_process_endpoint, request_data, capture.writes)
+    else:
+        remaining = expected_count - responded_count
+        logger.info("[Capture %s] %s/%s clients responded (%s remaining)", capture_id, responded_count, expected_count, remaining)
 
 @app.route('/upload_frame', methods=['POST'])
 def upload_frame():
@@ -326,7 +1056,7 @@ def upload_frame():
         if 'metadata' not in request.form:
             return jsonify({"status": "error", "message": "No metadata provided"}), 400
         
-        metadata = json.loads(request.form.get('metadata'))
+        metadata = orjson.loads(request.form['metadata'])
         
         # Get image file
         if 'image' not in request.files:
@@ -336,45 +1066,54 @@ def upload_frame():
         if image_file.filename == '':
             return jsonify({"status": "error", "message": "Empty image file"}), 400
         
-        image_data = image_file.read()
+        # Stream the spooled uploads straight to disk rather than reading them into memory
+        image_data = image_file.stream
         depth_file = request.files.get('depth')
         depth_data = None
 
         if depth_file and depth_file.filename:
-            depth_data = depth_file.read()
-            if not depth_data:
-                depth_data = None
+            depth_data = depth_file.stream
         
         # Get WebSocket session ID from IP address mapping (this is the unique Socket.IO session ID)
         websocket_session_id = client_ip_to_session_id.get(client_addr)
         
         # Save files using shared helper function
-        image_filename, depth_filename, metadata_filename, frame_number, tracking_id, metadata_to_save = save_frame_files(
+        image_filename, depth_filename, metadata_filename, frame_number, tracking_id, write_future = save_frame_files(
             metadata, image_data, depth_data, client_addr, client_id, websocket_session_id
         )
         
-        # Process and display camera data
-        process_camera_data(metadata_to_save, image_data, depth_data, client_id)
+        # Process and display camera data in the background
+        submit_camera_data_report(metadata, image_filename, depth_filename, client_id, write_future)
         
         # Handle capture response tracking
-        handle_capture_response(metadata_to_save, tracking_id, image_filename, depth_filename, metadata_filename)
+        handle_capture_response(metadata, tracking_id, image_filename, depth_filename, metadata_filename, write_future)
         
+        # 202: the files are queued for writing and may not be on disk yet
         return jsonify({
             "status": "received",
             "frame": frame_number,
             "depth_saved": depth_filename is not None,
             "message": "Frame uploaded successfully"
-        })
+        }), 202
         
-    except json.JSONDecodeError as e:
-        print(f"[{client_id}] Error parsing JSON metadata: {e}")
+    except RequestEntityTooLarge:
+        # Let the 413 error handler answer without logging a traceback
+        raise
+    except WriteBacklogFull as e:
+        logger.warning("[%s] Rejecting frame: %s", client_id, e)
+        return jsonify({"status": "error", "message": str(e)}), 503, {"Retry-After": "1"}
+    except orjson.JSONDecodeError as e:
+        logger.error("[%s] Error parsing JSON metadata: %s", client_id, e)
         return jsonify({"status": "error", "message": f"Invalid JSON: {str(e)}"}), 400
     except Exception as e:
-        print(f"[{client_id}] Error processing frame: {e}")
-        import traceback
-        traceback.print_exc()
+        log_error("[%s] Error processing frame: %s", client_id, e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.errorhandler(RequestEntityTooLarge)
+def handle_upload_too_large(e):
+    """Return a small JSON error for uploads larger than MAX_CONTENT_LENGTH."""
+    return jsonify({"status": "error", "message": f"Upload exceeds {MAX_UPLOAD_SIZE} bytes"}), 413
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
@@ -423,9 +1162,7 @@ def trigger_capture_endpoint():
                 "connected_clients": 0
             }), 400
     except Exception as e:
-        print(f"[Trigger Endpoint] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[Trigger Endpoint] Error: %s", e)
         return jsonify({
             "status": "error",
             "message": str(e)
@@ -438,27 +1175,53 @@ def handle_connect():
     client_id = request.sid
     client_ip = request.remote_addr
     
-    # Check if this client is already in the set (shouldn't happen, but be safe)
-    was_already_connected = client_id in connected_clients
-    connected_clients.add(client_id)
+    with connection_lock:
+        # Check if this client is already in the set (shouldn't happen, but be safe)
+        was_already_connected = client_id in connected_clients
+        connected_clients.add(client_id)
+        
+        # Map IP address to WebSocket session ID
+        # If IP was mapped to a different session, update it
+        old_session = client_ip_to_session_id.get(client_ip)
+        old_session_connected = old_session in connected_clients
+        
+        client_ip_to_session_id[client_ip] = client_id
+        session_id_to_ip[client_id] = client_ip
+        client_count = len(connected_clients)
     
-    # Map IP address to WebSocket session ID
-    # If IP was mapped to a different session, update it
-    old_session = client_ip_to_session_id.get(client_ip)
-    if old_session and old_session != client_id and old_session in connected_clients:
+    if old_session and old_session != client_id and old_session_connected:
         # Old session still exists, keep both mappings if possible
         # But typically the old session should have been cleaned up
-        print(f"[WebSocket] Warning: IP {client_ip} was mapped to {old_session}, now connecting as {client_id}")
-    
-    client_ip_to_session_id[client_ip] = client_id
+        logger.warning("[WebSocket] Warning: IP %s was mapped to %s, now connecting as %s", client_ip, old_session, client_id)
     
     if was_already_connected:
-        print(f"\n[WebSocket] Client reconnected (was already in set): {client_id} (IP: {client_ip})")
+        logger.info("\n[WebSocket] Client reconnected (was already in set): %s (IP: %s)", client_id, client_ip)
     else:
-        print(f"\n[WebSocket] Client connected: {client_id} (IP: {client_ip})")
-    print(f"[WebSocket] Total connected clients: {len(connected_clients)}")
+        logger.info("\n[WebSocket] Client connected: %s (IP: %s)", client_id, client_ip)
+    logger.info("[WebSocket] Total connected clients: %s", client_count)
+    # Receive capture_frame broadcasts (Socket.IO drops the room membership on disconnect)
+    join_room(CAPTURE_ROOM)
     emit('connected', {'status': 'connected', 'client_id': client_id})
 
+def forget_session_ip(session_id):
+    """
+    Drop a session's IP mapping, unless the IP has since been remapped to a newer session.
+    
+    Args:
+        session_id: WebSocket session ID that is going away
+    
+    Returns:
+        The session's IP address if its mapping was removed, None otherwise
+    """
+    with connection_lock:
+        if session_id not in session_id_to_ip:
+            return None
+        client_ip = session_id_to_ip.pop(session_id)
+        if client_ip_to_session_id.get(client_ip) == session_id:
+            del client_ip_to_session_id[client_ip]
+            return client_ip
+    return None
+
 def cleanup_stale_connections():
     """Remove any clients from connected_clients that are no longer actually connected."""
     try:
@@ -481,162 +1244,185 @@ def cleanup_stale_connections():
                         if participants:
                             actual_sessions.update(participants)
         except Exception as e:
-            print(f"[WebSocket] Could not query Flask-SocketIO manager: {e}")
+            logger.warning("[WebSocket] Could not query Flask-SocketIO manager: %s", e)
             return 0
         
-        # Remove stale entries (clients in our set but not actually connected)
-        stale_clients = connected_clients - actual_sessions
+        # Remove stale entries (clients in our set but not actually connected); only
+        # this diff-and-update holds the lock, not the manager query above
+        with connection_lock:
+            stale_clients = connected_clients - actual_sessions
+            if stale_clients:
+                connected_clients.difference_update(stale_clients)
+                # Also clean up IP mappings for stale clients
+                for sid in stale_clients:
+                    forget_session_ip(sid)
         if stale_clients:
-            print(f"[WebSocket] Cleaning up {len(stale_clients)} stale connection(s): {stale_clients}")
-            connected_clients.difference_update(stale_clients)
-            # Also clean up IP mappings for stale clients
-            stale_ips = [ip for ip, sid in client_ip_to_session_id.items() if sid in stale_clients]
-            for ip in stale_ips:
-                del client_ip_to_session_id[ip]
+            logger.info("[WebSocket] Cleaning up %s stale connection(s): %s", len(stale_clients), stale_clients)
             return len(stale_clients)
     except Exception as e:
-        print(f"[WebSocket] Error during stale connection cleanup: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[WebSocket] Error during stale connection cleanup: %s", e)
     return 0
 
 @socketio.on('disconnect')
-def handle_disconnect(sid):
+def handle_disconnect(reason=None):
     """Handle WebSocket client disconnection."""
-    # Flask-SocketIO passes the session ID as a positional argument
-    client_id = sid
-    print(f"[WebSocket] Disconnect event received for client_id: {client_id}")
-    print(f"[WebSocket] Current connected_clients before removal: {connected_clients}")
+    # The positional argument is the disconnect reason (newer Flask-SocketIO), not the
+    # session ID, so take the session ID from the request context
+    client_id = request.sid
+    logger.debug("[WebSocket] Disconnect event received for client_id: %s", client_id)
     
-    # Get client IP if available
-    client_ip = None
-    try:
-        client_ip = request.remote_addr
-    except (AttributeError, RuntimeError):
-        pass
+    with connection_lock:
+        # Snapshot for the debug log, which is formatted later on the listener thread
+        clients_snapshot = list(connected_clients)
+        # Remove from connected clients set (this updates the count)
+        was_connected = client_id in connected_clients
+        connected_clients.discard(client_id)
+        # Remove IP mapping if it still points at this session
+        removed_ip = forget_session_ip(client_id)
+        client_count = len(connected_clients)
     
-    # Remove from connected clients set (this updates the count)
-    was_connected = client_id in connected_clients
     if was_connected:
-        connected_clients.discard(client_id)
-        print(f"\n[WebSocket] Client disconnected: {client_id}")
-        print(f"[WebSocket] Removed {client_id} from connected_clients set")
+        logger.info("\n[WebSocket] Client disconnected: %s", client_id)
+        logger.info("[WebSocket] Removed %s from connected_clients set", client_id)
     else:
-        print(f"\n[WebSocket] Client disconnected: {client_id} (was not in connected set)")
-        print(f"[WebSocket] Current connected_clients: {connected_clients}")
+        logger.info("\n[WebSocket] Client disconnected: %s (was not in connected set)", client_id)
+        logger.debug("[WebSocket] Current connected_clients: %s", clients_snapshot)
+    if removed_ip:
+        logger.info("[WebSocket] Removed IP mapping for %s", removed_ip)
     
-    # Remove IP mapping if it matches this session
-    if client_ip and client_ip in client_ip_to_session_id and client_ip_to_session_id[client_ip] == client_id:
-        del client_ip_to_session_id[client_ip]
-        print(f"[WebSocket] Removed IP mapping for {client_ip}")
+    # A reconnect gets a new session ID, so this session's frame counter is never used again
+    with frame_counters_lock:
+        frame_counters.pop(client_id, None)
     
     # Clean up any pending captures that expected this client
     with capture_lock:
-        captures_to_remove = []
-        for capture_id, expected_clients in pending_captures.items():
-            if client_id in expected_clients:
-                expected_clients.discard(client_id)
+        pending = list(captures.items())
+    captures_to_remove = []
+    for capture_id, capture in pending:
+        with capture.lock:
+            if client_id in capture.expected and not capture.closed:
+                capture.expected.discard(client_id)
                 # If no clients left to wait for, remove the capture
-                if len(expected_clients) == 0:
+                if len(capture.expected) == 0:
+                    capture.closed = True
                     captures_to_remove.append(capture_id)
-        
-        for capture_id in captures_to_remove:
-            if capture_id in pending_captures:
-                del pending_captures[capture_id]
-            if capture_id in capture_responses:
-                del capture_responses[capture_id]
-            if capture_id in capture_image_paths:
-                del capture_image_paths[capture_id]
+    
+    if captures_to_remove:
+        with capture_lock:
+            for capture_id in captures_to_remove:
+                captures.pop(capture_id, None)
     
     # Always print updated count after removal
-    print(f"[WebSocket] Total connected clients: {len(connected_clients)}")
+    logger.info("[WebSocket] Total connected clients: %s", client_count)
 
 @socketio.on_error_default
 def default_error_handler(e):
     """Handle Socket.IO errors."""
-    print(f"[WebSocket] Error: {e}")
-    import traceback
-    traceback.print_exc()
+    log_error("[WebSocket] Error: %s", e)
 
 @socketio.on('client_ready')
 def handle_client_ready(data):
     """Handle client ready message."""
     client_id = request.sid
     device_name = data.get('device_name', 'Unknown')
-    print(f"[WebSocket] Client ready: {device_name} ({client_id})")
+    logger.info("[WebSocket] Client ready: %s (%s)", device_name, client_id)
     # Ensure client is in connected_clients set
-    if client_id not in connected_clients:
+    with connection_lock:
+        was_missing = client_id not in connected_clients
         connected_clients.add(client_id)
-        print(f"[WebSocket] Added client to connected set: {client_id}")
-        print(f"[WebSocket] Total connected clients: {len(connected_clients)}")
+        client_count = len(connected_clients)
+    if was_missing:
+        logger.info("[WebSocket] Added client to connected set: %s", client_id)
+        logger.info("[WebSocket] Total connected clients: %s", client_count)
+
+def decode_frame_payload(payload):
+    """
+    Return the raw bytes of a WebSocket frame field.
+    
+    Clients that emit binary data get it delivered as bytes (a Socket.IO binary
+    attachment), which is used as-is; older clients send base64 strings, which
+    are decoded.
+    
+    Args:
+        payload: bytes-like object or base64-encoded string
+    
+    Returns:
+        bytes-like object with the decoded data
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return payload
+    return base64.b64decode(payload)
 
 @socketio.on('frame_response')
 def handle_frame_response(data):
-    """Handle frame data sent via WebSocket (for triggered captures)."""
+    """
+    Handle frame data sent via WebSocket (for triggered captures).
+    
+    Expects {'metadata': {...}, 'image': ..., 'depth': ...}; image and depth may be
+    binary attachments (preferred, no encoding overhead) or base64 strings.
+    """
     client_id = request.sid
     client_ip = request.remote_addr
     client_identifier = f"{client_ip}:{request.environ.get('REMOTE_PORT', 'unknown')}"
     
-    print(f"[WebSocket] Received frame_response from {client_identifier} (session: {client_id})")
+    logger.info("[WebSocket] Received frame_response from %s (session: %s)", client_identifier, client_id)
     
     try:
         # Socket.IO sends data directly as the emitted object
         if not isinstance(data, dict):
-            print(f"[WebSocket] Invalid data type: {type(data)}, expected dict")
+            logger.warning("[WebSocket] Invalid data type: %s, expected dict", type(data))
             emit('frame_response_error', {'status': 'error', 'message': 'Data must be a dictionary'})
             return
         
         # Extract metadata
         if 'metadata' not in data:
-            print(f"[WebSocket] Missing metadata in frame_response")
+            logger.warning("[WebSocket] Missing metadata in frame_response")
             emit('frame_response_error', {'status': 'error', 'message': 'No metadata provided'})
             return
         
         metadata = data['metadata']
         
-        # Extract and decode image data (base64)
+        # Extract image data (binary, or base64 from older clients)
         if 'image' not in data:
-            print(f"[WebSocket] Missing image data in frame_response")
+            logger.warning("[WebSocket] Missing image data in frame_response")
             emit('frame_response_error', {'status': 'error', 'message': 'No image data provided'})
             return
         
         try:
-            image_base64 = data['image']
-            image_data = base64.b64decode(image_base64)
-            print(f"[WebSocket] Decoded image data: {len(image_data)} bytes")
+            image_data = decode_frame_payload(data['image'])
+            logger.debug("[WebSocket] Decoded image data: %s bytes", len(image_data))
         except Exception as e:
-            print(f"[WebSocket] Failed to decode image: {e}")
+            logger.warning("[WebSocket] Failed to decode image: %s", e)
             emit('frame_response_error', {'status': 'error', 'message': f'Failed to decode image: {str(e)}'})
             return
         
-        # Extract and decode depth data (base64, optional)
+        # Extract depth data (binary or base64, optional)
         depth_data = None
         if 'depth' in data and data['depth']:
             try:
-                depth_base64 = data['depth']
-                depth_data = base64.b64decode(depth_base64)
-                print(f"[WebSocket] Decoded depth data: {len(depth_data)} bytes")
+                depth_data = decode_frame_payload(data['depth'])
+                logger.debug("[WebSocket] Decoded depth data: %s bytes", len(depth_data))
             except Exception as e:
-                print(f"[{client_identifier}] Warning: Failed to decode depth data: {e}")
+                logger.warning("[%s] Warning: Failed to decode depth data: %s", client_identifier, e)
                 depth_data = None
         
         # Use WebSocket session ID for tracking
         websocket_session_id = client_id
         
         # Save files using shared helper function
-        print(f"[WebSocket] Saving frame files...")
-        image_filename, depth_filename, metadata_filename, frame_number, tracking_id, metadata_to_save = save_frame_files(
+        logger.debug("[WebSocket] Saving frame files...")
+        image_filename, depth_filename, metadata_filename, frame_number, tracking_id, write_future = save_frame_files(
             metadata, image_data, depth_data, client_ip, client_identifier, websocket_session_id
         )
         
-        # Process and display camera data
-        process_camera_data(metadata_to_save, image_data, depth_data, client_identifier)
+        # Process and display camera data in the background
+        submit_camera_data_report(metadata, image_filename, depth_filename, client_identifier, write_future)
         
         # Handle capture response tracking
-        handle_capture_response(metadata_to_save, tracking_id, image_filename, depth_filename, metadata_filename)
+        handle_capture_response(metadata, tracking_id, image_filename, depth_filename, metadata_filename, write_future)
         
         # Send success response
-        print(f"[WebSocket] Frame {frame_number} processed successfully")
+        logger.info("[WebSocket] Frame %s processed successfully", frame_number)
         emit('frame_response_ack', {
             'status': 'received',
             'frame': frame_number,
@@ -644,18 +1430,28 @@ def handle_frame_response(data):
             'message': 'Frame received successfully'
         })
         
+    except WriteBacklogFull as e:
+        logger.warning("[%s] Rejecting WebSocket frame: %s", client_identifier, e)
+        emit('frame_response_error', {'status': 'error', 'message': str(e)})
     except Exception as e:
-        print(f"[{client_identifier}] Error processing WebSocket frame: {e}")
-        import traceback
-        traceback.print_exc()
+        log_error("[%s] Error processing WebSocket frame: %s", client_identifier, e)
         emit('frame_response_error', {'status': 'error', 'message': str(e)})
 
 def trigger_capture():
-    """Trigger a frame capture on all connected devices."""
+    """
+    Trigger a frame capture on all connected devices.
+    
+    Returns:
+        bool: True if a capture was started, False if no clients are connected
+    """
     # Clean up stale connections before checking count
     cleanup_stale_connections()
     
-    if len(connected_clients) > 0:
+    # Snapshot the clients this capture waits for; connects/disconnects may race with the trigger
+    with connection_lock:
+        expected_clients = set(connected_clients)
+    
+    if expected_clients:
         global last_trigger_time
         last_trigger_time = datetime.now()
         # Create a unique capture ID based on timestamp
@@ -664,66 +1460,125 @@ def trigger_capture():
             'timestamp': last_trigger_time.isoformat(),
             'capture_id': capture_id
         }
-        print(f"\n[Trigger] Broadcasting capture_frame to {len(connected_clients)} client(s)...")
-        print(f"[Trigger] Capture ID: {capture_id}")
-        print(f"[Trigger] Connected clients: {list(connected_clients)}")
+        logger.info("\n[Trigger] Broadcasting capture_frame to %s client(s)...", len(expected_clients))
+        logger.info("[Trigger] Capture ID: %s", capture_id)
+        logger.debug("[Trigger] Connected clients: %s", list(expected_clients))
         
         # Track which clients should respond to this capture
         with capture_lock:
-            pending_captures[capture_id] = set(connected_clients)
-            capture_responses[capture_id] = set()
-        
-        # Emit to each connected client individually to ensure all receive it
-        # This is more reliable than relying on broadcast behavior from background threads
-        clients_list = list(connected_clients)  # Create a copy to avoid modification during iteration
-        for client_id in clients_list:
-            socketio.emit('capture_frame', trigger_data, to=client_id)
-            print(f"[Trigger] Sent to client: {client_id}")
-        print(f"[Trigger] Capture command sent at {last_trigger_time.strftime('%H:%M:%S')}")
-        print(f"[Trigger] Waiting for {len(connected_clients)} client(s) to respond...")
+            captures[capture_id] = Capture(expected=expected_clients)
+        
+        # Emit once to the room every client joins on connect; the packet is encoded a
+        # single time and fanned out to each member, rather than once per client
+        socketio.emit('capture_frame', trigger_data, to=CAPTURE_ROOM)
+        logger.info("[Trigger] Capture command sent at %s", last_trigger_time.strftime('%H:%M:%S'))
+        logger.info("[Trigger] Waiting for %s client(s) to respond...", len(expected_clients))
         return True
     else:
-        print("\n[Trigger] No clients connected. Skipping capture...")
+        logger.info("\n[Trigger] No clients connected. Skipping capture...")
+        return False
+
+def iter_stdin_lines():
+    """
+    Yield lines typed on stdin, waiting for input on the event loop.
+    
+    The wait is a selector in threading mode and a hub trampoline under
+    eventlet (whose green select() does not wake for tty/pipe input), so the
+    keyboard task parks until input arrives instead of tying up a blocking
+    read. Input is read from the raw file descriptor so several lines arriving
+    together each yield, rather than sitting unseen in sys.stdin's buffer.
+    
+    Yields:
+        str: Each complete line, including the trailing newline
+    """
+    fd = sys.stdin.fileno()
+    if not stat.S_ISFIFO(os.fstat(fd).st_mode) and not os.isatty(fd):
+        # Regular files and /dev/null are always readable and can't be polled
+        # (epoll rejects them); plain reads never stall on them
+        yield from iter(sys.stdin.readline, '')
+        return
+    
+    selector = None
+    if ASYNC_MODE == 'eventlet':
+        from eventlet.hubs import trampoline
+        wait_readable = partial(trampoline, fd, read=True)
+    else:
+        selector = selectors.DefaultSelector()
+        selector.register(fd, selectors.EVENT_READ)
+        wait_readable = selector.select
+    
+    pending = b''
+    try:
+        while True:
+            wait_readable()
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                yield line.decode(errors='replace') + '\n'
+    finally:
+        if selector is not None:
+            selector.close()
+
+def stdin_has_input():
+    """
+    Check whether stdin can ever deliver keyboard triggers.
+    
+    Returns:
+        bool: False when stdin is closed or a non-tty character device such as
+        /dev/null (the usual case under systemd or docker without -i)
+    """
+    try:
+        fd = sys.stdin.fileno()
+        mode = os.fstat(fd).st_mode
+    except (AttributeError, ValueError, OSError):
         return False
+    return os.isatty(fd) or not stat.S_ISCHR(mode)
 
 def keyboard_input_thread():
-    """Background thread to listen for keyboard input and trigger captures."""
-    print("\n" + "="*60)
-    print("WebSocket Remote Trigger Active")
-    print("Press ENTER to trigger frame capture on all connected devices")
-    print("="*60 + "\n")
+    """Background task (started via socketio.start_background_task) that triggers captures on Enter."""
+    logger.info("\n" + "="*60)
+    logger.info("WebSocket Remote Trigger Active")
+    logger.info("Press ENTER to trigger frame capture on all connected devices")
+    logger.info("="*60 + "\n")
     
-    while True:
-        try:
-            # Read a line from stdin (blocks until Enter is pressed)
-            line = sys.stdin.readline()
-            if line.strip() == '' or line.strip() == '\n':
-                # Enter key pressed
-                trigger_capture()
-        except (EOFError, KeyboardInterrupt):
-            print("\n[Keyboard] Stopping keyboard input thread...")
-            break
-        except Exception as e:
-            print(f"\n[Keyboard] Error in keyboard thread: {e}")
-            import traceback
-            traceback.print_exc()
+    try:
+        for line in iter_stdin_lines():
+            try:
+                if line.strip() == '':
+                    # Enter key pressed
+                    trigger_capture()
+                    # Yield so the async backend can flush the broadcast right away
+                    socketio.sleep(0)
+            except Exception as e:
+                logger.exception("\n[Keyboard] Error in keyboard thread: %s", e)
+    except KeyboardInterrupt:
+        pass
+    logger.info("\n[Keyboard] Stopping keyboard input thread...")
 
 def interval_capture_thread(interval_ms):
-    """Background thread to trigger captures at specified millisecond intervals."""
+    """Background task (started via socketio.start_background_task) that triggers captures at specified millisecond intervals."""
     interval_seconds = interval_ms / 1000.0
-    print(f"\n[Interval] Starting automatic capture at {interval_ms}ms intervals ({interval_seconds:.3f}s)")
+    logger.info("\n[Interval] Starting automatic capture at %sms intervals (%.3fs)", interval_ms, interval_seconds)
     
+    # Sleep until fixed deadlines so trigger and emit time don't accumulate as drift
+    next_tick = time.monotonic() + interval_seconds
     while True:
         try:
-            time.sleep(interval_seconds)
+            socketio.sleep(max(0.0, next_tick - time.monotonic()))
             trigger_capture()
+            next_tick += interval_seconds
+            now = time.monotonic()
+            if next_tick < now:
+                # Fell more than a full interval behind; skip the missed ticks instead of bursting
+                next_tick = now + interval_seconds
         except KeyboardInterrupt:
-            print("\n[Interval] Stopping interval capture thread...")
+            logger.info("\n[Interval] Stopping interval capture thread...")
             break
         except Exception as e:
-            print(f"\n[Interval] Error in interval capture thread: {e}")
-            import traceback
-            traceback.print_exc()
+            log_error("\n[Interval] Error in interval capture thread: %s", e)
 
 if __name__ == '__main__':
     # Parse command line arguments
@@ -734,32 +1589,61 @@ if __name__ == '__main__':
         metavar='MS',
         help='Trigger frame capture from all connected devices at specified millisecond interval (e.g., --interval 1000 for 1 second intervals)'
     )
+    parser.add_argument(
+        '--log-level',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        help='Server log level; DEBUG also prints per-frame camera intrinsics/extrinsics and depth statistics (default: INFO)'
+    )
+    parser.add_argument(
+        '--compress-depth',
+        action='store_true',
+        help='Save depth maps Blosc2-compressed (LZ4 + bit-shuffle) as *_depth.blosc2 instead of raw *_depth.bin (requires blosc2)'
+    )
     args = parser.parse_args()
+    setup_logging(getattr(logging, args.log_level))
+
+    if args.compress_depth:
+        if blosc2 is None:
+            logger.error("Error: --compress-depth requires the blosc2 package (pip install blosc2)")
+            sys.exit(1)
+        COMPRESS_DEPTH = True
+
+    if logger.isEnabledFor(logging.DEBUG):
+        warm_up_depth_statistics()
     
-    print(f"Flask server starting on 0.0.0.0:8080")
-    print(f"WebSocket server starting on 0.0.0.0:8080")
-    print(f"Images will be saved to: {os.path.abspath(RECEIVED_DIR)}")
-    print(f"Supports multiple clients simultaneously")
-    print(f"Endpoints:")
-    print(f"  POST /upload_frame - Upload AR frame with image and metadata")
-    print(f"  GET  /health - Health check")
-    print(f"  POST/GET /trigger_capture - Trigger frame capture on all connected devices")
-    print(f"  WebSocket /socket.io - WebSocket connection for remote triggering")
-    print()
-    
-    # Start interval capture thread if interval is specified
+    logger.info("Flask server starting on 0.0.0.0:8080")
+    logger.info("WebSocket server starting on 0.0.0.0:8080")
+    logger.info("Images will be saved to: %s", RECEIVED_DIR_ABS)
+    logger.info("Supports multiple clients simultaneously")
+    logger.info("Endpoints:")
+    logger.info("  POST /upload_frame - Upload AR frame with image and metadata")
+    logger.info("  GET  /health - Health check")
+    logger.info("  POST/GET /trigger_capture - Trigger frame capture on all connected devices")
+    logger.info("  WebSocket /socket.io - WebSocket connection for remote triggering")
+    logger.info("")
+    
+    # Start interval capture task if interval is specified
     if args.interval:
         if args.interval <= 0:
-            print(f"Error: Interval must be positive (got {args.interval}ms)")
+            logger.error("Error: Interval must be positive (got %sms)", args.interval)
             sys.exit(1)
-        interval_thread = threading.Thread(target=interval_capture_thread, args=(args.interval,), daemon=True)
-        interval_thread.start()
-        print(f"[Main] Automatic capture enabled: {args.interval}ms intervals")
+        socketio.start_background_task(interval_capture_thread, args.interval)
+        logger.info("[Main] Automatic capture enabled: %sms intervals", args.interval)
     else:
         # Start keyboard input thread only if interval mode is not enabled
-        keyboard_thread = threading.Thread(target=keyboard_input_thread, daemon=True)
-        keyboard_thread.start()
-        print(f"[Main] Manual capture mode: Press ENTER to trigger captures")
+        # and stdin can actually deliver key presses
+        if stdin_has_input():
+            # Run inside the Socket.IO server's own task context so emits need no cross-thread hop
+            socketio.start_background_task(keyboard_input_thread)
+            logger.info("[Main] Manual capture mode: Press ENTER to trigger captures")
+        else:
+            logger.info("[Main] Manual capture mode: stdin is not interactive, use POST /trigger_capture")
     
     # Run SocketIO server (which includes Flask)
-    socketio.run(app, host='0.0.0.0', port=8080, debug=False, allow_unsafe_werkzeug=True)
+    run_options = {}
+    if ASYNC_MODE == 'threading':
+        # Only the Werkzeug development server needs (and accepts) this flag
+        run_options['allow_unsafe_werkzeug'] = True
+    logger.info("[Main] Async mode: %s", ASYNC_MODE)
+    socketio.run(app, host='0.0.0.0', port=8080, debug=False, **run_options)